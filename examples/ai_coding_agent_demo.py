@@ -14,17 +14,110 @@ memory store with bitemporal capabilities. It showcases:
 
 The demo simulates an AI agent working on a software project, making decisions,
 learning from experience, and correcting its understanding over time.
+
+Records are typed ``msgspec`` structs stored as deflated MessagePack, so the
+``msgspec`` package is required; install it with ``pip install -e ".[demo]"``.
 """
 
 import os
 import tempfile
 import hashlib
+import zlib
+from functools import lru_cache
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional
+
+import msgspec
+
+from llmdb.kv import KV
+from llmdb.temporal_key import Key, pack_fields
+from llmdb.kv import RawValue
+
+
+MAX_TIMESTAMP = 2**64 - 1
+
+# Each record category lives in its own partition so it can be counted in O(1).
+# Contexts stream in time order, so they take the highest partition, where
+# in-order writes land at the end of the key space and can use MDB_APPEND.
+# META holds per-database constants such as the agent id.
+META, ANALYSIS, DECISION, KNOWLEDGE, CONTEXT = range(5)
+
+AGENT_ID_KEY = Key(partition=META, user_key=b"agent_id")
+
+# User key prefixes, encoded once instead of on every put and lookup
+ANALYSIS_PREFIX = b"agent:analysis:"
+DECISION_PREFIX = b"agent:decision:"
+CONTEXT_PREFIX = b"agent:context:"
+KNOWLEDGE_PREFIX = b"agent:knowledge:"
+
+
+# Typed records encode as MessagePack arrays, so top-level field names are
+# never stored; only the free-form nested dicts carry their keys.
+class AnalysisRecord(msgspec.Struct, array_like=True):
+    file_path: str
+    analysis: Dict[str, Any]
+    confidence: float
+    source: str = "static_analysis"
+
+
+class DecisionRecord(msgspec.Struct, array_like=True):
+    task_id: str
+    decision: str
+    reasoning: List[str]
+    alternatives: List[str]
+    confidence: float
+    context: Dict[str, Any]
+    estimated_impact: str = "medium"
+    revision_reason: Optional[str] = None
+
+
+class ContextRecord(msgspec.Struct, array_like=True):
+    session_id: str
+    context: Dict[str, Any]
+
+
+class KnowledgeRecord(msgspec.Struct, array_like=True):
+    domain: str
+    knowledge: Dict[str, Any]
+    confidence: float
+    source: str = "learning"
+
+
+# Encoder and typed decoders are built once and reused; each decoder is
+# specialized for its record type and returns instances of it directly.
+RECORD_ENCODER = msgspec.msgpack.Encoder()
+RECORD_DECODERS = {
+    ANALYSIS: msgspec.msgpack.Decoder(AnalysisRecord),
+    DECISION: msgspec.msgpack.Decoder(DecisionRecord),
+    CONTEXT: msgspec.msgpack.Decoder(ContextRecord),
+    KNOWLEDGE: msgspec.msgpack.Decoder(KnowledgeRecord),
+}
+
+# Preset zlib dictionary of the nested field names and values that recur in
+# every record; even a single small record compresses well against it.
+# Records written with one dictionary can only be read back with the same bytes.
+RECORD_ZDICT = b"".join(s.encode() for s in (
+    "lines_of_code", "complexity_score", "dependencies", "patterns",
+    "security_issues", "test_coverage", "recommendations", "correction_reason",
+    "estimated_hours", "deployment_phases", "current_task", "focus_area",
+    "user_priority", "files_reviewed", "issues_found", "best_practices",
+    "common_vulnerabilities", "recommended_libraries", "documentation_study",
+    "hands_on_analysis", "severity", "critical", "medium", "high", "source",
+    "static_analysis", "confidence",
+))
+
 
-from llmdb import KV
-from llmdb.temporal_key import Key
-from llmdb.kv._codec import JSONValue
+def encode_record(record: msgspec.Struct) -> RawValue:
+    """MessagePack-encode a record and deflate it against RECORD_ZDICT"""
+    compressor = zlib.compressobj(wbits=-15, zdict=RECORD_ZDICT)
+    packed = RECORD_ENCODER.encode(record)
+    return RawValue(payload=compressor.compress(packed) + compressor.flush())
+
+
+def decode_record(value: RawValue, decoder: msgspec.msgpack.Decoder) -> msgspec.Struct:
+    """Inverse of :func:`encode_record`"""
+    decompressor = zlib.decompressobj(wbits=-15, zdict=RECORD_ZDICT)
+    return decoder.decode(decompressor.decompress(value.payload))
 
 
 def format_datetime(dt: datetime) -> str:
@@ -32,169 +125,165 @@ def format_datetime(dt: datetime) -> str:
     return dt.strftime("%Y-%m-%d %H:%M:%S")
 
 
+@lru_cache(maxsize=4096)
+def path_tag(file_path: str) -> bytes:
+    """Short, stable tag for a file path (used in keys, not for security)"""
+    return hashlib.blake2b(file_path.encode(), digest_size=8).hexdigest().encode()
+
+
+def format_timestamp(us: int) -> str:
+    """Format a microsecond timestamp for display"""
+    return format_datetime(datetime.fromtimestamp(us / 1_000_000))
+
+
 def get_timestamp_microseconds(dt: datetime) -> int:
     """Convert datetime to microseconds since epoch"""
     return int(dt.timestamp() * 1_000_000)
 
 
+class LazyRecord:
+    """Read-only view of a stored record, decoded on first attribute access"""
+    
+    __slots__ = ("_value", "_decoder", "_record")
+    
+    def __init__(self, value, decoder: msgspec.msgpack.Decoder):
+        self._value = value
+        self._decoder = decoder
+        self._record = None
+        
+    def __getattr__(self, field):
+        if self._record is None:
+            self._record = decode_record(self._value, self._decoder)
+        return getattr(self._record, field)
+
+
 class AIAgentMemoryDemo:
     """Demonstrates AI agent memory patterns using LLMDB"""
     
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, agent_id: str = "coding_assistant_v1"):
         self.db = KV(db_path)
-        self.agent_id = "coding_assistant_v1"
+        # The agent id is stored once per database rather than in every record
+        stored = self.db.get(AGENT_ID_KEY)
+        if stored is None:
+            self.db.put(AGENT_ID_KEY, RawValue(payload=agent_id.encode()))
+            self.agent_id = agent_id
+        else:
+            self.agent_id = stored.payload.decode()
+        self._writer = self.db
+        self._batch = None
+        self._last_context_ts: Dict[str, int] = {}
+        
+    def __enter__(self):
+        """Buffer all writes in one transaction until the block exits"""
+        self._batch = self.db.batch()
+        self._writer = self._batch.__enter__()
+        return self
+        
+    def __exit__(self, *exc_info):
+        batch, self._batch, self._writer = self._batch, None, self.db
+        return batch.__exit__(*exc_info)
         
     def analyze_code_file(self, file_path: str, analysis_data: dict, timestamp: datetime):
         """Store code analysis results with temporal tracking"""
-        file_hash = hashlib.sha256(file_path.encode()).hexdigest()[:16]
-        key = Key(
-            partition=0,
-            user_key=f"agent:analysis:{file_hash}",
-            valid_from=get_timestamp_microseconds(timestamp)
+        analysis_record = AnalysisRecord(
+            file_path=file_path,
+            analysis=analysis_data,
+            confidence=analysis_data.get("confidence", 0.5),
         )
         
-        analysis_record = {
-            "agent_id": self.agent_id,
-            "file_path": file_path,
-            "timestamp": timestamp.isoformat(),
-            "analysis": analysis_data,
-            "confidence": analysis_data.get("confidence", 0.5),
-            "source": "static_analysis"
-        }
-        
-        self.db.put(key, JSONValue(payload=analysis_record))
+        key = pack_fields(ANALYSIS, ANALYSIS_PREFIX + path_tag(file_path), get_timestamp_microseconds(timestamp))
+        self._writer.put_raw(key, encode_record(analysis_record))
         
     def make_decision(self, task_id: str, decision_data: dict, timestamp: datetime):
         """Record agent decision with reasoning"""
-        key = Key(
-            partition=0,
-            user_key=f"agent:decision:{task_id}",
-            valid_from=get_timestamp_microseconds(timestamp)
+        decision_record = DecisionRecord(
+            task_id=task_id,
+            decision=decision_data["decision"],
+            reasoning=decision_data.get("reasoning", []),
+            alternatives=decision_data.get("alternatives", []),
+            confidence=decision_data.get("confidence", 0.5),
+            context=decision_data.get("context", {}),
+            estimated_impact=decision_data.get("impact", "medium"),
+            revision_reason=decision_data.get("revision_reason"),
         )
         
-        decision_record = {
-            "agent_id": self.agent_id,
-            "task_id": task_id,
-            "timestamp": timestamp.isoformat(),
-            "decision": decision_data["decision"],
-            "reasoning": decision_data.get("reasoning", []),
-            "alternatives": decision_data.get("alternatives", []),
-            "confidence": decision_data.get("confidence", 0.5),
-            "context": decision_data.get("context", {}),
-            "estimated_impact": decision_data.get("impact", "medium")
-        }
-        
-        self.db.put(key, JSONValue(payload=decision_record))
+        key = pack_fields(DECISION, DECISION_PREFIX + task_id.encode(), get_timestamp_microseconds(timestamp))
+        self._writer.put_raw(key, encode_record(decision_record))
         
     def update_conversation_context(self, session_id: str, context_data: dict, timestamp: datetime):
         """Update conversation context"""
-        key = Key(
-            partition=0,
-            user_key=f"agent:context:{session_id}",
-            valid_from=get_timestamp_microseconds(timestamp)
+        context_record = ContextRecord(
+            session_id=session_id,
+            context=context_data,
         )
         
-        context_record = {
-            "agent_id": self.agent_id,
-            "session_id": session_id,
-            "timestamp": timestamp.isoformat(),
-            "context": context_data
-        }
-        
-        self.db.put(key, JSONValue(payload=context_record))
+        ts = get_timestamp_microseconds(timestamp)
+        in_order = ts > self._last_context_ts.get(session_id, -1)
+        if in_order:
+            self._last_context_ts[session_id] = ts
+        key = pack_fields(CONTEXT, CONTEXT_PREFIX + session_id.encode(), ts)
+        self._writer.put_raw(key, encode_record(context_record), append=in_order)
         
     def store_knowledge(self, domain: str, knowledge_data: dict, timestamp: datetime):
         """Store learned knowledge"""
-        key = Key(
-            partition=0,
-            user_key=f"agent:knowledge:{domain}",
-            valid_from=get_timestamp_microseconds(timestamp)
+        knowledge_record = KnowledgeRecord(
+            domain=domain,
+            knowledge=knowledge_data,
+            confidence=knowledge_data.get("confidence", 0.5),
+            source=knowledge_data.get("source", "learning"),
         )
         
-        knowledge_record = {
-            "agent_id": self.agent_id,
-            "domain": domain,
-            "timestamp": timestamp.isoformat(),
-            "knowledge": knowledge_data,
-            "confidence": knowledge_data.get("confidence", 0.5),
-            "source": knowledge_data.get("source", "learning")
-        }
-        
-        self.db.put(key, JSONValue(payload=knowledge_record))
-        
-    def get_analysis_history(self, file_path: str) -> List[Dict]:
-        """Get evolution of analysis for a file"""
-        file_hash = hashlib.sha256(file_path.encode()).hexdigest()[:16]
-        versions = []
-        prefix = f"agent:analysis:{file_hash}".encode()
-        
-        for key, value in self.db.items():
-            if key.user_key.startswith(prefix):
-                valid_time = datetime.fromtimestamp(key.valid_from / 1_000_000)
-                versions.append({
-                    "valid_time": valid_time,
-                    "tx_id": key.tx_id,
-                    "data": value.payload
-                })
-                
-        return sorted(versions, key=lambda x: x["valid_time"])
-        
-    def get_decision_history(self, task_id: str) -> List[Dict]:
-        """Get decision evolution for a task"""
-        versions = []
-        prefix = f"agent:decision:{task_id}".encode()
-        
-        for key, value in self.db.items():
-            if key.user_key.startswith(prefix):
-                valid_time = datetime.fromtimestamp(key.valid_from / 1_000_000)
-                versions.append({
-                    "valid_time": valid_time,
-                    "tx_id": key.tx_id,
-                    "data": value.payload
-                })
-                
-        return sorted(versions, key=lambda x: x["valid_time"])
-        
-    def get_knowledge_evolution(self, domain: str) -> List[Dict]:
-        """Track knowledge evolution in a domain"""
-        versions = []
-        prefix = f"agent:knowledge:{domain}".encode()
-        
-        for key, value in self.db.items():
-            if key.user_key.startswith(prefix):
-                valid_time = datetime.fromtimestamp(key.valid_from / 1_000_000)
-                versions.append({
-                    "valid_time": valid_time,
-                    "tx_id": key.tx_id,
-                    "data": value.payload
-                })
-                
-        return sorted(versions, key=lambda x: x["valid_time"])
+        key = pack_fields(KNOWLEDGE, KNOWLEDGE_PREFIX + domain.encode(), get_timestamp_microseconds(timestamp))
+        self._writer.put_raw(key, encode_record(knowledge_record))
+        
+    def _iter_versions(self, partition: int, user_key: bytes, valid_after: int = -1) -> Iterator[Dict]:
+        """Yield versions of ``user_key`` valid after ``valid_after``, ordered by valid time"""
+        # Versions of a user key are already in valid-time order, interleaved
+        # only with longer keys it is a prefix of, so a bounded range scan
+        # filtered on the exact user key visits little else and nothing
+        # needs sorting. Valid time comes from the
+        # key and stays an integer until it is displayed.
+        lo = Key(partition=partition, user_key=user_key, valid_from=valid_after + 1, tx_id=0)
+        hi = Key(partition=partition, user_key=user_key, valid_from=MAX_TIMESTAMP, tx_id=MAX_TIMESTAMP)
+        decoder = RECORD_DECODERS[partition]
+        
+        with self.db.cursor(partition) as cursor:
+            for key, value in cursor.iter_range(lo, hi):
+                if key.user_key == user_key:
+                    yield {
+                        "valid_from": key.valid_from,
+                        "tx_id": key.tx_id,
+                        "data": LazyRecord(value, decoder)
+                    }
+        
+    def iter_analysis_history(self, file_path: str) -> Iterator[Dict]:
+        """Yield the evolution of analysis for a file"""
+        return self._iter_versions(ANALYSIS, ANALYSIS_PREFIX + path_tag(file_path))
+        
+    def iter_decision_history(self, task_id: str) -> Iterator[Dict]:
+        """Yield the decision evolution for a task"""
+        return self._iter_versions(DECISION, DECISION_PREFIX + task_id.encode())
+        
+    def iter_knowledge_evolution(self, domain: str) -> Iterator[Dict]:
+        """Yield the knowledge evolution in a domain"""
+        return self._iter_versions(KNOWLEDGE, KNOWLEDGE_PREFIX + domain.encode())
+        
+    def iter_knowledge_changes_after(self, domain: str, timestamp: datetime) -> Iterator[Dict]:
+        """Yield knowledge versions in a domain that became valid after ``timestamp``"""
+        return self._iter_versions(
+            KNOWLEDGE, KNOWLEDGE_PREFIX + domain.encode(), get_timestamp_microseconds(timestamp)
+        )
         
     def get_agent_state_summary(self) -> Dict:
         """Get summary of current agent state"""
-        state = {
-            "analyses": 0,
-            "decisions": 0, 
-            "contexts": 0,
-            "knowledge_domains": 0,
-            "total_records": 0
+        # Counters are maintained by the store, so no records are scanned
+        return {
+            "analyses": self.db.count(ANALYSIS),
+            "decisions": self.db.count(DECISION),
+            "contexts": self.db.count(CONTEXT),
+            "knowledge_domains": self.db.count(KNOWLEDGE),
+            "total_records": self.db.count() - self.db.count(META),
         }
-        
-        for key, value in self.db.items():
-            state["total_records"] += 1
-            user_key = key.user_key.decode()
-            
-            if user_key.startswith("agent:analysis:"):
-                state["analyses"] += 1
-            elif user_key.startswith("agent:decision:"):
-                state["decisions"] += 1
-            elif user_key.startswith("agent:context:"):
-                state["contexts"] += 1
-            elif user_key.startswith("agent:knowledge:"):
-                state["knowledge_domains"] += 1
-                
-        return state
 
 
 def run_agent_simulation():
@@ -209,189 +298,191 @@ def run_agent_simulation():
         print("\nSimulating an AI agent working on a software project...")
         print("The agent will analyze code, make decisions, learn, and correct itself.\n")
         
-        # === Phase 1: Initial Project Analysis ===
-        print("📊 Phase 1: Initial Project Analysis")
-        print("-" * 40)
-        
-        base_time = datetime.now() - timedelta(days=7)  # Simulate a week ago
-        
-        # Analyze authentication module
-        print(f"🔍 {format_datetime(base_time)}: Analyzing auth module...")
-        agent.analyze_code_file("src/auth/login.py", {
-            "lines_of_code": 156,
-            "complexity_score": 8.5,
-            "dependencies": ["bcrypt", "jwt", "flask"],
-            "patterns": ["factory", "decorator"],
-            "security_issues": ["hardcoded_secret", "no_rate_limiting"],
-            "test_coverage": 0.65,
-            "confidence": 0.72,
-            "recommendations": [
-                "Extract secret to environment variable",
-                "Add rate limiting middleware",
-                "Improve test coverage"
-            ]
-        }, base_time)
-        
-        # Update conversation context
-        agent.update_conversation_context("session_001", {
-            "current_task": "security_audit",
-            "focus_area": "authentication",
-            "user_priority": "high",
-            "files_reviewed": ["src/auth/login.py"],
-            "issues_found": 2
-        }, base_time)
-        
-        # Make decision about security fixes
-        print(f"🎯 {format_datetime(base_time + timedelta(minutes=30))}: Making security decision...")
-        agent.make_decision("fix_auth_security", {
-            "decision": "Implement comprehensive auth security fixes",
-            "reasoning": [
-                "Found hardcoded secrets which is critical security risk",
-                "Missing rate limiting allows brute force attacks",
-                "Low test coverage increases risk of regressions"
-            ],
-            "alternatives": [
-                "Quick fix only the hardcoded secret",
-                "Postpone fixes until next sprint"
-            ],
-            "confidence": 0.85,
-            "context": {
-                "severity": "critical",
-                "estimated_hours": 8,
-                "dependencies": ["environment_setup", "testing_framework"]
-            },
-            "impact": "high"
-        }, base_time + timedelta(minutes=30))
-        
-        # === Phase 2: Learning and Knowledge Updates ===
-        print("\n🧠 Phase 2: Knowledge Learning and Updates")
-        print("-" * 40)
-        
-        learning_time = base_time + timedelta(days=1)
-        print(f"📚 {format_datetime(learning_time)}: Learning about Flask security...")
-        
-        # Store initial security knowledge
-        agent.store_knowledge("flask_security", {
-            "best_practices": [
-                "Use environment variables for secrets",
-                "Implement CSRF protection",
-                "Add rate limiting",
-                "Use secure session cookies"
-            ],
-            "common_vulnerabilities": [
-                "SQL injection",
-                "XSS attacks", 
-                "CSRF attacks",
-                "Session fixation"
-            ],
-            "recommended_libraries": [
-                "flask-limiter",
-                "flask-wtf",
-                "flask-talisman"
-            ],
-            "confidence": 0.78,
-            "source": "documentation_study"
-        }, learning_time)
-        
-        # === Phase 3: Deeper Analysis and Corrections ===
-        print("\n🔄 Phase 3: Deeper Analysis and Corrections")
-        print("-" * 40)
-        
-        correction_time = base_time + timedelta(days=2)
-        print(f"🔍 {format_datetime(correction_time)}: Re-analyzing with deeper inspection...")
-        
-        # Corrected analysis after more thorough review
-        agent.analyze_code_file("src/auth/login.py", {
-            "lines_of_code": 156,
-            "complexity_score": 7.2,  # Revised down after understanding structure
-            "dependencies": ["bcrypt", "jwt", "flask", "redis"],  # Found hidden Redis dependency
-            "patterns": ["factory", "decorator", "observer"],  # Found observer pattern for logging
-            "security_issues": [
-                "hardcoded_secret",
-                "no_rate_limiting", 
-                "insufficient_password_validation"  # New issue found
-            ],
-            "test_coverage": 0.65,
-            "confidence": 0.88,  # Higher confidence after thorough review
-            "recommendations": [
-                "Extract secret to environment variable",
-                "Add rate limiting middleware",
-                "Strengthen password validation rules",
-                "Add security event logging"
-            ],
-            "correction_reason": "Found additional security issue and Redis dependency on deeper inspection"
-        }, correction_time)
-        
-        # Update knowledge with new findings
-        print(f"📝 {format_datetime(correction_time + timedelta(minutes=15))}: Updating security knowledge...")
-        agent.store_knowledge("flask_security", {
-            "best_practices": [
-                "Use environment variables for secrets",
-                "Implement CSRF protection", 
-                "Add rate limiting",
-                "Use secure session cookies",
-                "Implement strong password policies",  # New learning
-                "Add security event logging"  # New learning
-            ],
-            "common_vulnerabilities": [
-                "SQL injection",
-                "XSS attacks",
-                "CSRF attacks", 
-                "Session fixation",
-                "Weak password policies",  # New learning
-                "Insufficient logging"  # New learning
-            ],
-            "recommended_libraries": [
-                "flask-limiter",
-                "flask-wtf",
-                "flask-talisman",
-                "python-decouple",  # For env management
-                "structlog"  # For security logging
-            ],
-            "confidence": 0.91,  # Increased confidence
-            "source": "hands_on_analysis",
-            "correction_reason": "Found additional security considerations during code analysis"
-        }, correction_time + timedelta(minutes=15))
-        
-        # === Phase 4: Decision Revision ===
-        print("\n⚡ Phase 4: Decision Revision")
-        print("-" * 40)
-        
-        revision_time = base_time + timedelta(days=3)
-        print(f"🎯 {format_datetime(revision_time)}: Revising security fix decision...")
-        
-        # Revise decision based on new knowledge
-        agent.make_decision("fix_auth_security", {
-            "decision": "Implement comprehensive auth security fixes with phased approach",
-            "reasoning": [
-                "Found additional security issue requiring password policy update",
-                "Need to add security logging for compliance",
-                "Phased approach reduces deployment risk",
-                "Redis dependency requires coordinated deployment"
-            ],
-            "alternatives": [
-                "Original comprehensive fix all at once",
-                "Minimal fixes only for immediate security"
-            ],
-            "confidence": 0.93,  # Higher confidence with better understanding
-            "context": {
-                "severity": "critical",
-                "estimated_hours": 12,  # Increased estimate
-                "dependencies": [
-                    "environment_setup", 
-                    "testing_framework",
-                    "redis_configuration",  # New dependency
-                    "logging_infrastructure"  # New dependency
-                ],
-                "deployment_phases": [
-                    "secrets_and_validation",
-                    "rate_limiting_and_logging", 
-                    "testing_and_monitoring"
+        # All writes of phases 1-4 commit together in one transaction
+        with agent:
+            # === Phase 1: Initial Project Analysis ===
+            print("📊 Phase 1: Initial Project Analysis")
+            print("-" * 40)
+            
+            base_time = datetime.now() - timedelta(days=7)  # Simulate a week ago
+            
+            # Analyze authentication module
+            print(f"🔍 {format_datetime(base_time)}: Analyzing auth module...")
+            agent.analyze_code_file("src/auth/login.py", {
+                "lines_of_code": 156,
+                "complexity_score": 8.5,
+                "dependencies": ["bcrypt", "jwt", "flask"],
+                "patterns": ["factory", "decorator"],
+                "security_issues": ["hardcoded_secret", "no_rate_limiting"],
+                "test_coverage": 0.65,
+                "confidence": 0.72,
+                "recommendations": [
+                    "Extract secret to environment variable",
+                    "Add rate limiting middleware",
+                    "Improve test coverage"
                 ]
-            },
-            "impact": "high",
-            "revision_reason": "Discovered additional security requirements and deployment dependencies"
-        }, revision_time)
+            }, base_time)
+            
+            # Update conversation context
+            agent.update_conversation_context("session_001", {
+                "current_task": "security_audit",
+                "focus_area": "authentication",
+                "user_priority": "high",
+                "files_reviewed": ["src/auth/login.py"],
+                "issues_found": 2
+            }, base_time)
+            
+            # Make decision about security fixes
+            print(f"🎯 {format_datetime(base_time + timedelta(minutes=30))}: Making security decision...")
+            agent.make_decision("fix_auth_security", {
+                "decision": "Implement comprehensive auth security fixes",
+                "reasoning": [
+                    "Found hardcoded secrets which is critical security risk",
+                    "Missing rate limiting allows brute force attacks",
+                    "Low test coverage increases risk of regressions"
+                ],
+                "alternatives": [
+                    "Quick fix only the hardcoded secret",
+                    "Postpone fixes until next sprint"
+                ],
+                "confidence": 0.85,
+                "context": {
+                    "severity": "critical",
+                    "estimated_hours": 8,
+                    "dependencies": ["environment_setup", "testing_framework"]
+                },
+                "impact": "high"
+            }, base_time + timedelta(minutes=30))
+            
+            # === Phase 2: Learning and Knowledge Updates ===
+            print("\n🧠 Phase 2: Knowledge Learning and Updates")
+            print("-" * 40)
+            
+            learning_time = base_time + timedelta(days=1)
+            print(f"📚 {format_datetime(learning_time)}: Learning about Flask security...")
+            
+            # Store initial security knowledge
+            agent.store_knowledge("flask_security", {
+                "best_practices": [
+                    "Use environment variables for secrets",
+                    "Implement CSRF protection",
+                    "Add rate limiting",
+                    "Use secure session cookies"
+                ],
+                "common_vulnerabilities": [
+                    "SQL injection",
+                    "XSS attacks", 
+                    "CSRF attacks",
+                    "Session fixation"
+                ],
+                "recommended_libraries": [
+                    "flask-limiter",
+                    "flask-wtf",
+                    "flask-talisman"
+                ],
+                "confidence": 0.78,
+                "source": "documentation_study"
+            }, learning_time)
+            
+            # === Phase 3: Deeper Analysis and Corrections ===
+            print("\n🔄 Phase 3: Deeper Analysis and Corrections")
+            print("-" * 40)
+            
+            correction_time = base_time + timedelta(days=2)
+            print(f"🔍 {format_datetime(correction_time)}: Re-analyzing with deeper inspection...")
+            
+            # Corrected analysis after more thorough review
+            agent.analyze_code_file("src/auth/login.py", {
+                "lines_of_code": 156,
+                "complexity_score": 7.2,  # Revised down after understanding structure
+                "dependencies": ["bcrypt", "jwt", "flask", "redis"],  # Found hidden Redis dependency
+                "patterns": ["factory", "decorator", "observer"],  # Found observer pattern for logging
+                "security_issues": [
+                    "hardcoded_secret",
+                    "no_rate_limiting", 
+                    "insufficient_password_validation"  # New issue found
+                ],
+                "test_coverage": 0.65,
+                "confidence": 0.88,  # Higher confidence after thorough review
+                "recommendations": [
+                    "Extract secret to environment variable",
+                    "Add rate limiting middleware",
+                    "Strengthen password validation rules",
+                    "Add security event logging"
+                ],
+                "correction_reason": "Found additional security issue and Redis dependency on deeper inspection"
+            }, correction_time)
+            
+            # Update knowledge with new findings
+            print(f"📝 {format_datetime(correction_time + timedelta(minutes=15))}: Updating security knowledge...")
+            agent.store_knowledge("flask_security", {
+                "best_practices": [
+                    "Use environment variables for secrets",
+                    "Implement CSRF protection", 
+                    "Add rate limiting",
+                    "Use secure session cookies",
+                    "Implement strong password policies",  # New learning
+                    "Add security event logging"  # New learning
+                ],
+                "common_vulnerabilities": [
+                    "SQL injection",
+                    "XSS attacks",
+                    "CSRF attacks", 
+                    "Session fixation",
+                    "Weak password policies",  # New learning
+                    "Insufficient logging"  # New learning
+                ],
+                "recommended_libraries": [
+                    "flask-limiter",
+                    "flask-wtf",
+                    "flask-talisman",
+                    "python-decouple",  # For env management
+                    "structlog"  # For security logging
+                ],
+                "confidence": 0.91,  # Increased confidence
+                "source": "hands_on_analysis",
+                "correction_reason": "Found additional security considerations during code analysis"
+            }, correction_time + timedelta(minutes=15))
+            
+            # === Phase 4: Decision Revision ===
+            print("\n⚡ Phase 4: Decision Revision")
+            print("-" * 40)
+            
+            revision_time = base_time + timedelta(days=3)
+            print(f"🎯 {format_datetime(revision_time)}: Revising security fix decision...")
+            
+            # Revise decision based on new knowledge
+            agent.make_decision("fix_auth_security", {
+                "decision": "Implement comprehensive auth security fixes with phased approach",
+                "reasoning": [
+                    "Found additional security issue requiring password policy update",
+                    "Need to add security logging for compliance",
+                    "Phased approach reduces deployment risk",
+                    "Redis dependency requires coordinated deployment"
+                ],
+                "alternatives": [
+                    "Original comprehensive fix all at once",
+                    "Minimal fixes only for immediate security"
+                ],
+                "confidence": 0.93,  # Higher confidence with better understanding
+                "context": {
+                    "severity": "critical",
+                    "estimated_hours": 12,  # Increased estimate
+                    "dependencies": [
+                        "environment_setup", 
+                        "testing_framework",
+                        "redis_configuration",  # New dependency
+                        "logging_infrastructure"  # New dependency
+                    ],
+                    "deployment_phases": [
+                        "secrets_and_validation",
+                        "rate_limiting_and_logging", 
+                        "testing_and_monitoring"
+                    ]
+                },
+                "impact": "high",
+                "revision_reason": "Discovered additional security requirements and deployment dependencies"
+            }, revision_time)
         
         # === Phase 5: Memory Analysis and Reporting ===
         print("\n📈 Phase 5: Memory Analysis and Reporting")
@@ -408,11 +499,10 @@ def run_agent_simulation():
         
         # Show analysis evolution
         print(f"\n🔄 Code Analysis Evolution for 'src/auth/login.py':")
-        analysis_history = agent.get_analysis_history("src/auth/login.py")
-        for i, version in enumerate(analysis_history):
+        for i, version in enumerate(agent.iter_analysis_history("src/auth/login.py")):
             data = version["data"]
-            analysis = data["analysis"]
-            print(f"   Version {i+1} ({format_datetime(version['valid_time'])}):")
+            analysis = data.analysis
+            print(f"   Version {i+1} ({format_timestamp(version['valid_from'])}):")
             print(f"      Complexity: {analysis['complexity_score']}")
             print(f"      Issues: {len(analysis['security_issues'])}")
             print(f"      Confidence: {analysis['confidence']:.2f}")
@@ -421,23 +511,21 @@ def run_agent_simulation():
         
         # Show decision evolution  
         print(f"\n🎯 Decision Evolution for 'fix_auth_security':")
-        decision_history = agent.get_decision_history("fix_auth_security")
-        for i, version in enumerate(decision_history):
+        for i, version in enumerate(agent.iter_decision_history("fix_auth_security")):
             data = version["data"]
-            print(f"   Version {i+1} ({format_datetime(version['valid_time'])}):")
-            print(f"      Decision: {data['decision'][:50]}...")
-            print(f"      Confidence: {data['confidence']:.2f}")
-            print(f"      Estimated Hours: {data['context'].get('estimated_hours', 'Unknown')}")
-            if "revision_reason" in data:
-                print(f"      Revision: {data['revision_reason']}")
+            print(f"   Version {i+1} ({format_timestamp(version['valid_from'])}):")
+            print(f"      Decision: {data.decision[:50]}...")
+            print(f"      Confidence: {data.confidence:.2f}")
+            print(f"      Estimated Hours: {data.context.get('estimated_hours', 'Unknown')}")
+            if data.revision_reason is not None:
+                print(f"      Revision: {data.revision_reason}")
         
         # Show knowledge evolution
         print(f"\n🧠 Knowledge Evolution for 'flask_security':")
-        knowledge_history = agent.get_knowledge_evolution("flask_security")
-        for i, version in enumerate(knowledge_history):
+        for i, version in enumerate(agent.iter_knowledge_evolution("flask_security")):
             data = version["data"]
-            knowledge = data["knowledge"]
-            print(f"   Version {i+1} ({format_datetime(version['valid_time'])}):")
+            knowledge = data.knowledge
+            print(f"   Version {i+1} ({format_timestamp(version['valid_from'])}):")
             print(f"      Best Practices: {len(knowledge['best_practices'])}")
             print(f"      Vulnerabilities: {len(knowledge['common_vulnerabilities'])}")
             print(f"      Libraries: {len(knowledge['recommended_libraries'])}")
@@ -453,22 +541,20 @@ def run_agent_simulation():
         query_time = base_time + timedelta(days=1, hours=12)  # Mid-way through learning
         print(f"\n🕐 What did the agent know about Flask security on {format_datetime(query_time)}?")
         
-        # Simulate temporal query by finding latest version before query time
+        # Seek straight to the latest version valid at the query time
         query_timestamp = get_timestamp_microseconds(query_time)
         latest_knowledge = None
         
-        for key, value in agent.db.items():
-            user_key = key.user_key.decode()
-            if user_key == "agent:knowledge:flask_security":
-                if key.valid_from <= query_timestamp:
-                    if latest_knowledge is None or key.valid_from > latest_knowledge["timestamp"]:
-                        latest_knowledge = {
-                            "timestamp": key.valid_from,
-                            "data": value.payload
-                        }
+        found = agent.db.as_of_valid(KNOWLEDGE, KNOWLEDGE_PREFIX + b"flask_security", query_timestamp)
+        if found is not None:
+            key, value = found
+            latest_knowledge = {
+                "timestamp": key.valid_from,
+                "data": decode_record(value, RECORD_DECODERS[KNOWLEDGE])
+            }
         
         if latest_knowledge:
-            knowledge = latest_knowledge["data"]["knowledge"]
+            knowledge = latest_knowledge["data"].knowledge
             print(f"   At that time, the agent knew about {len(knowledge['best_practices'])} best practices:")
             for practice in knowledge["best_practices"][:3]:
                 print(f"      • {practice}")
@@ -476,19 +562,25 @@ def run_agent_simulation():
         
         # Show what changed after that time
         print(f"\n🔄 What changed in the agent's knowledge after {format_datetime(query_time)}?")
-        later_versions = []
-        for version in knowledge_history:
-            if version["valid_time"] > query_time:
-                later_versions.append(version)
         
-        for version in later_versions:
-            data = version["data"]
-            knowledge = data["knowledge"]
-            print(f"   Update at {format_datetime(version['valid_time'])}:")
-            print(f"      New best practices: {len(knowledge['best_practices']) - len(latest_knowledge['data']['knowledge']['best_practices']) if latest_knowledge else 0}")
-            print(f"      Confidence change: +{knowledge['confidence'] - (latest_knowledge['data']['knowledge']['confidence'] if latest_knowledge else 0):.2f}")
+        # Baselines for the deltas below, looked up once rather than per version
+        if latest_knowledge:
+            baseline = latest_knowledge["data"].knowledge
+            baseline_bp = len(baseline["best_practices"])
+            baseline_conf = baseline["confidence"]
+        else:
+            baseline_bp, baseline_conf = 0, 0.0
+        
+        report = []
+        for version in agent.iter_knowledge_changes_after("flask_security", query_time):
+            knowledge = version["data"].knowledge
+            report.append(f"   Update at {format_timestamp(version['valid_from'])}:")
+            report.append(f"      New best practices: {len(knowledge['best_practices']) - baseline_bp}")
+            report.append(f"      Confidence change: +{knowledge['confidence'] - baseline_conf:.2f}")
             if "correction_reason" in knowledge:
-                print(f"      Reason: {knowledge['correction_reason']}")
+                report.append(f"      Reason: {knowledge['correction_reason']}")
+        if report:
+            print("\n".join(report))
         
         print(f"\n✨ Key Insights from LLMDB Bitemporal Memory:")
         print("   • Complete audit trail of agent learning and decision-making")
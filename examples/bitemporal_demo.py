@@ -16,12 +16,13 @@ Features demonstrated:
 
 import os
 import tempfile
+from bisect import bisect_right
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Dict, Any, List, Optional
 
-from llmdb import KV
+from llmdb.kv import KV, Batch, JSONValue
 from llmdb.temporal_key import Key
-from llmdb.kv._codec import JSONValue
 
 
 def format_datetime(dt: datetime) -> str:
@@ -29,6 +30,17 @@ def format_datetime(dt: datetime) -> str:
     return dt.strftime("%Y-%m-%d %H:%M:%S")
 
 
+def to_microseconds(dt: datetime) -> int:
+    """Convert a datetime to the microsecond timestamps used in keys"""
+    return int(dt.timestamp() * 1_000_000)
+
+
+@lru_cache(maxsize=4096)
+def format_timestamp(us: int) -> str:
+    """Format a microsecond timestamp for display, memoized per timestamp"""
+    return format_datetime(datetime.fromtimestamp(us / 1_000_000))
+
+
 def format_currency(amount: float) -> str:
     """Format currency for display"""
     return f"${amount:,.2f}"
@@ -39,34 +51,84 @@ class EmployeeTracker:
     
     def __init__(self, db_path: str):
         self.db = KV(db_path)
+        # Per-employee history and its valid times, dropped whenever this
+        # tracker writes a record for that employee
+        self._history_cache: Dict[str, List[tuple]] = {}
+        self._valid_times: Dict[str, List[int]] = {}
+        self._key_cache: Dict[str, bytes] = {}
+        self._last_tx_id = 0
+        
+    def _employee_key(self, employee_id: str) -> bytes:
+        """Encoded user key for an employee, built once per employee"""
+        user_key = self._key_cache.get(employee_id)
+        if user_key is None:
+            user_key = self._key_cache[employee_id] = f"employee:{employee_id}".encode()
+        return user_key
         
     def add_employee_record(self, employee_id: str, data: Dict[str, Any], 
-                          valid_from: datetime) -> None:
-        """Add an employee record with specific valid time"""
+                          valid_from: datetime, batch: Optional[Batch] = None) -> None:
+        """Add an employee record with specific valid time
+        
+        Pass a ``batch`` from ``db.batch()`` to share its transaction.
+        """
+        # Each write gets its own transaction time, so a correction at an
+        # existing valid time adds a version instead of replacing one
+        self._last_tx_id = max(self.db.clock.now_ts(), self._last_tx_id + 1)
         key = Key(
             partition=0,
-            user_key=f"employee:{employee_id}",
-            valid_from=int(valid_from.timestamp() * 1_000_000)  # microseconds
+            user_key=self._employee_key(employee_id),
+            valid_from=to_microseconds(valid_from),
+            tx_id=self._last_tx_id
         )
-        self.db.put(key, JSONValue(payload=data))
+        (batch or self.db).put(key, JSONValue.from_obj(data))
+        self._history_cache.pop(employee_id, None)
+        self._valid_times.pop(employee_id, None)
         
     def get_current_employee(self, employee_id: str) -> Optional[Dict[str, Any]]:
         """Get current employee record"""
-        key = Key(partition=0, user_key=f"employee:{employee_id}")
-        result = self.db.get(key)
-        return result.payload if result else None
+        result = self.db.get_latest(0, self._employee_key(employee_id))
+        return result.to_obj() if result else None
         
     def get_employee_history(self, employee_id: str) -> List[tuple]:
-        """Get all versions of an employee record"""
+        """Get all versions of an employee record as (valid_from_us, tx_id, data)
+        
+        The list is cached and shared between calls; don't modify it.
+        """
+        cached = self._history_cache.get(employee_id)
+        if cached is not None:
+            return cached
+            
         versions = []
-        prefix = f"employee:{employee_id}".encode()
+        user_key = self._employee_key(employee_id)
         
-        for key, value in self.db.items():
-            if key.user_key.startswith(prefix):
-                valid_time = datetime.fromtimestamp(key.valid_from / 1_000_000)
-                versions.append((valid_time, key.tx_id, value.payload))
+        # Versions come back from the prefix scan already ordered by valid time
+        with self.db.cursor(0) as cursor:
+            for key, value in cursor.iter_prefix(user_key):
+                if key.user_key == user_key:
+                    versions.append((key.valid_from, key.tx_id, value.to_obj()))
                 
-        return sorted(versions, key=lambda x: x[0])  # Sort by valid time
+        self._history_cache[employee_id] = versions
+        return versions
+        
+    def as_of_valid(self, employee_id: str, valid_at: datetime) -> Optional[tuple]:
+        """Get the version of an employee record that was valid at ``valid_at``"""
+        history = self.get_employee_history(employee_id)
+        times = self._valid_times.get(employee_id)
+        if times is None:
+            times = self._valid_times[employee_id] = [v[0] for v in history]
+        # Versions sharing a valid time are ordered by tx_id, so a tie resolves
+        # to the latest correction
+        idx = bisect_right(times, to_microseconds(valid_at)) - 1
+        return history[idx] if idx >= 0 else None
+        
+    def history_arrays(self, employee_id: str):
+        """Get (valid_from_us, tx_id, salary) NumPy arrays for bulk queries
+        
+        Requires the ``analytics`` extra (NumPy).
+        """
+        from llmdb.analytics import history_arrays
+        return history_arrays(self.db, 0, self._employee_key(employee_id),
+                              lambda value: value.to_obj()["salary"])
         
     def print_employee_summary(self, employee_id: str):
         """Print a summary of an employee's record history"""
@@ -79,15 +141,15 @@ class EmployeeTracker:
             print("No records found.")
             return
             
-        print(f"{'Valid From':<20} {'Tx ID':<8} {'Salary':<12} {'Department':<15} {'Status'}")
-        print("-" * 80)
+        print(f"{'Valid From':<20} {'Tx ID':<10} {'Salary':<12} {'Department':<15} {'Status'}")
+        print("-" * 82)
         
-        for valid_time, tx_id, data in history:
+        for valid_from, tx_id, data in history:
             salary = format_currency(data.get('salary', 0))
             department = data.get('department', 'Unknown')[:14]
             status = data.get('status', 'Unknown')
             
-            print(f"{format_datetime(valid_time):<20} {tx_id:<8} {salary:<12} {department:<15} {status}")
+            print(f"{format_timestamp(valid_from):<20} {tx_id:<10} {salary:<12} {department:<15} {status}")
 
 
 def main():
@@ -102,60 +164,62 @@ def main():
         print("=" * 50)
         print("\nScenario: Employee Salary Tracking with Corrections\n")
         
-        # Employee Alice starts working
-        start_date = datetime(2022, 1, 1, 9, 0, 0)
-        print(f"📅 {format_datetime(start_date)}: Alice hired as Software Engineer")
-        tracker.add_employee_record("alice", {
-            "name": "Alice Johnson",
-            "salary": 75000,
-            "department": "Engineering",
-            "status": "Active",
-            "hire_date": "2022-01-01"
-        }, start_date)
+        # The initial records share one write transaction
+        with tracker.db.batch() as batch:
+            # Employee Alice starts working
+            start_date = datetime(2022, 1, 1, 9, 0, 0)
+            print(f"📅 {format_datetime(start_date)}: Alice hired as Software Engineer")
+            tracker.add_employee_record("alice", {
+                "name": "Alice Johnson",
+                "salary": 75000,
+                "department": "Engineering",
+                "status": "Active",
+                "hire_date": "2022-01-01"
+            }, start_date, batch=batch)
         
-        # Mid-year performance review and raise
-        review_date = datetime(2022, 6, 15, 14, 30, 0)
-        print(f"📅 {format_datetime(review_date)}: Alice receives performance raise")
-        tracker.add_employee_record("alice", {
-            "name": "Alice Johnson",
-            "salary": 82000,  # 7k raise
-            "department": "Engineering",
-            "status": "Active",
-            "hire_date": "2022-01-01",
-            "last_review": "2022-06-15",
-            "performance_rating": "Exceeds Expectations"
-        }, review_date)
+            # Mid-year performance review and raise
+            review_date = datetime(2022, 6, 15, 14, 30, 0)
+            print(f"📅 {format_datetime(review_date)}: Alice receives performance raise")
+            tracker.add_employee_record("alice", {
+                "name": "Alice Johnson",
+                "salary": 82000,  # 7k raise
+                "department": "Engineering",
+                "status": "Active",
+                "hire_date": "2022-01-01",
+                "last_review": "2022-06-15",
+                "performance_rating": "Exceeds Expectations"
+            }, review_date, batch=batch)
         
-        # Promotion to Senior Engineer
-        promotion_date = datetime(2023, 1, 1, 10, 0, 0)
-        print(f"📅 {format_datetime(promotion_date)}: Alice promoted to Senior Engineer")
-        tracker.add_employee_record("alice", {
-            "name": "Alice Johnson",
-            "salary": 95000,  # Promotion raise
-            "department": "Engineering",
-            "status": "Active",
-            "title": "Senior Software Engineer",
-            "hire_date": "2022-01-01",
-            "promotion_date": "2023-01-01",
-            "last_review": "2022-06-15",
-            "performance_rating": "Exceeds Expectations"
-        }, promotion_date)
+            # Promotion to Senior Engineer
+            promotion_date = datetime(2023, 1, 1, 10, 0, 0)
+            print(f"📅 {format_datetime(promotion_date)}: Alice promoted to Senior Engineer")
+            tracker.add_employee_record("alice", {
+                "name": "Alice Johnson",
+                "salary": 95000,  # Promotion raise
+                "department": "Engineering",
+                "status": "Active",
+                "title": "Senior Software Engineer",
+                "hire_date": "2022-01-01",
+                "promotion_date": "2023-01-01",
+                "last_review": "2022-06-15",
+                "performance_rating": "Exceeds Expectations"
+            }, promotion_date, batch=batch)
         
-        # Team lead promotion
-        lead_date = datetime(2023, 8, 1, 9, 0, 0)
-        print(f"📅 {format_datetime(lead_date)}: Alice becomes Team Lead")
-        tracker.add_employee_record("alice", {
-            "name": "Alice Johnson",
-            "salary": 110000,  # Management raise
-            "department": "Engineering",
-            "status": "Active",
-            "title": "Engineering Team Lead",
-            "hire_date": "2022-01-01",
-            "promotion_date": "2023-08-01",
-            "last_review": "2022-06-15",
-            "performance_rating": "Exceeds Expectations",
-            "reports": 5
-        }, lead_date)
+            # Team lead promotion
+            lead_date = datetime(2023, 8, 1, 9, 0, 0)
+            print(f"📅 {format_datetime(lead_date)}: Alice becomes Team Lead")
+            tracker.add_employee_record("alice", {
+                "name": "Alice Johnson",
+                "salary": 110000,  # Management raise
+                "department": "Engineering",
+                "status": "Active",
+                "title": "Engineering Team Lead",
+                "hire_date": "2022-01-01",
+                "promotion_date": "2023-08-01",
+                "last_review": "2022-06-15",
+                "performance_rating": "Exceeds Expectations",
+                "reports": 5
+            }, lead_date, batch=batch)
         
         # HR discovers a payroll error - Alice's June raise was entered incorrectly
         correction_date = datetime.now()
@@ -186,30 +250,34 @@ def main():
         july_2022 = datetime(2022, 7, 15)
         print(f"\n🕐 Query: What was Alice's salary on {format_datetime(july_2022)}?")
         
-        # This would be the temporal query (when implemented):
-        # salary_in_july = tracker.get_employee_as_of_valid("alice", july_2022)
-        # For now, we'll simulate it by looking at the history
-        
-        history = tracker.get_employee_history("alice")
-        salary_in_july = None
-        for valid_time, tx_id, data in sorted(history, key=lambda x: x[0]):
-            if valid_time <= july_2022:
-                salary_in_july = data
-            else:
-                break
+        version = tracker.as_of_valid("alice", july_2022)
+        salary_in_july = version[2] if version else None
                 
         if salary_in_july:
             print(f"   Answer: {format_currency(salary_in_july['salary'])}")
             print(f"   (This was from the June 15 raise)")
         
+        # Many as-of queries at once, as one vectorized binary search
+        quarters = [datetime(year, month, 1) for year in (2022, 2023) for month in (1, 4, 7, 10)]
+        print(f"\n📈 Query: Alice's salary at the start of each quarter")
+        try:
+            import numpy as np
+            from llmdb.analytics import as_of_values
+            valid_from, _, salaries = tracker.history_arrays("alice")
+            query = np.array([to_microseconds(q) for q in quarters])
+            for quarter, salary in zip(quarters, as_of_values(valid_from, salaries, query)):
+                print(f"   {quarter:%Y-%m}: {'n/a' if np.isnan(salary) else format_currency(salary)}")
+        except ImportError:
+            print("   (install llmdb[analytics] for NumPy-backed history queries)")
+        
         # Show what the corrected history looks like
         print(f"\n📊 Current view of Alice's salary history:")
         print("   (After the payroll correction)")
         
         current_history = tracker.get_employee_history("alice")
-        for valid_time, tx_id, data in current_history:
+        for valid_from, tx_id, data in current_history:
             salary = format_currency(data['salary'])
-            print(f"   {format_datetime(valid_time)}: {salary}")
+            print(f"   {format_timestamp(valid_from)}: {salary}")
             
         print(f"\n💡 Key Insights:")
         print("   • Each record has both valid time (when true) and transaction time (when recorded)")
@@ -1,4 +1,4 @@
 """LLMDB core package."""
 
-__all__ = ["kv", "graph", "temporal", "wasm_exec"]
+__all__ = ["kv", "graph", "temporal", "wasm_exec", "analytics"]
 __version__ = "0.1.0"
@@ -0,0 +1,66 @@
+"""Vectorised queries over version histories; requires the ``analytics`` extra."""
+
+from __future__ import annotations
+
+__all__ = ["as_of_values", "history_arrays"]
+
+from typing import TYPE_CHECKING, Callable
+
+from .kv import KV, Value
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without the analytics extra
+    _HAVE_NUMPY = False
+else:
+    _HAVE_NUMPY = True
+
+if TYPE_CHECKING:
+    from numpy.typing import NDArray
+
+
+def _require_numpy() -> None:
+    if not _HAVE_NUMPY:
+        raise ImportError("llmdb.analytics requires the 'numpy' package")
+
+
+def history_arrays(
+    kv: KV, partition: int, user_key: bytes, extract: Callable[[Value], float]
+) -> tuple[NDArray[np.int64], NDArray[np.int64], NDArray[np.float64]]:
+    """Return ``(valid_from, tx_id, values)`` arrays for every version of ``user_key``.
+
+    The history is read with one prefix scan and is already in
+    ``(valid_from, tx_id)`` order; ``extract`` maps each stored value to a number.
+    """
+    _require_numpy()
+    valid_from: list[int] = []
+    tx_id: list[int] = []
+    values: list[float] = []
+    with kv.cursor(partition) as cursor:
+        for key, value in cursor.iter_prefix(user_key):
+            if key.user_key == user_key:
+                valid_from.append(key.valid_from)
+                tx_id.append(key.tx_id)
+                values.append(extract(value))
+    return (
+        np.array(valid_from, dtype=np.int64),
+        np.array(tx_id, dtype=np.int64),
+        np.array(values, dtype=np.float64),
+    )
+
+
+def as_of_values(
+    valid_from: NDArray[np.int64], values: NDArray[np.float64], query: NDArray[np.int64]
+) -> NDArray[np.float64]:
+    """Return the value valid at each ``query`` time, or NaN before the first version.
+
+    ``valid_from`` must be sorted, as returned by :func:`history_arrays`; each
+    lookup is a binary search, and ties resolve to the last (newest) version.
+    """
+    _require_numpy()
+    if len(valid_from) == 0:
+        return np.full(len(query), np.nan)
+    idx = np.searchsorted(valid_from, query, side="right") - 1
+    out = values[np.maximum(idx, 0)]
+    out[idx < 0] = np.nan
+    return out
@@ -4,11 +4,10 @@ from __future__ import annotations
 
 __all__ = ["Graph", "NodeId", "Edge"]
 
-import json
 from typing import Any, Iterator
 
 from .kv import KV
-from .kv._codec import JSONValue
+from .kv._codec import JSONValue, json_loads
 from .temporal_key import Key
 
 
@@ -24,22 +23,26 @@ class Graph:
 
     def _edge_key(self, src: NodeId, dst: NodeId, valid_from: int, tx_id: int) -> Key:
         user_key = src + b"\x00" + dst
-        return (1, user_key, valid_from, tx_id)
+        return Key(1, user_key, valid_from, tx_id)
 
     def put_edge(self, e: Edge, *, valid_from: int, tx_id: int) -> None:
         src, dst, props = e
-        payload = json.dumps(props).encode()
         self.kv.put(
-            self._edge_key(src, dst, valid_from, tx_id), JSONValue(payload=payload)
+            self._edge_key(src, dst, valid_from, tx_id), JSONValue.from_obj(props)
         )
 
     def out_edges(self, node: NodeId, as_of_valid: int) -> Iterator[Edge]:
-        for key, value in self.kv.items():
-            partition, user_key, valid_from, _ = key
-            if partition != 1 or valid_from > as_of_valid:
-                continue
-            src, dst = user_key.split(b"\x00", 1)
-            if src != node:
-                continue
-            props = json.loads(value.payload.decode())
-            yield (src, dst, props)
+        prefix = node + b"\x00"
+        with self.kv.cursor(1) as cursor:
+            for key, value in cursor.iter_prefix(prefix):
+                if key.valid_from > as_of_valid:
+                    continue
+                yield (node, key.user_key[len(prefix) :], json_loads(value.payload))
+
+    def out_neighbors(self, node: NodeId, as_of_valid: int) -> Iterator[NodeId]:
+        """Yield the targets :meth:`out_edges` would return, skipping edge properties."""
+        prefix = node + b"\x00"
+        with self.kv.cursor(1) as cursor:
+            for key in cursor.iter_prefix_keys(prefix):
+                if key.valid_from <= as_of_valid:
+                    yield key.user_key[len(prefix) :]
@@ -2,44 +2,472 @@
 
 from __future__ import annotations
 
-__all__ = ["KV"]
+__all__ = ["KV", "Batch", "Cursor", "RawValue", "JSONValue", "MsgPackValue", "Value"]
 
 import lmdb
-from typing import Iterable, Optional
+import struct
+import threading
+from contextlib import contextmanager, nullcontext
+from typing import ContextManager, Iterable, Iterator, Optional
 
-from ._codec import JSONValue, RawValue, Value, decode, encode
-from ..temporal_key import Key, pack, unpack
+from ._codec import JSONValue, MsgPackValue, RawValue, Value, decode, encode
+from ..temporal_key import PARTITION, VERSION, Key, pack, unpack
 from ..temporal import Clock, MonotonicClock
 
+_MAX_U64 = 2**64 - 1
+_COUNT = struct.Struct(">Q")
+_TX_ID = struct.Struct(">Q")
+
+
+def _tx_key(raw_key: bytes) -> bytes:
+    """Rotate a packed key's trailing ``tx_id`` to the front, keeping its length."""
+    return raw_key[-_TX_ID.size :] + raw_key[: -_TX_ID.size]
+
+
+def _as_value(value: Value | bytes | bytearray | memoryview) -> Value:
+    if isinstance(value, bytes):
+        return RawValue(payload=value)
+    if isinstance(value, (bytearray, memoryview)):
+        return RawValue(payload=bytes(value))
+    return value
+
+
+class Batch:
+    """Operations sharing one LMDB transaction; see :meth:`KV.batch`."""
+
+    def __init__(self, kv: KV, txn: lmdb.Transaction[bytes]) -> None:
+        self.kv = kv
+        self.txn = txn
+
+    def get(self, key: Key) -> Optional[Value]:
+        raw = self.txn.get(pack(key))
+        return decode(raw) if raw is not None else None
+
+    def put(self, key: Key, value: Value | bytes, *, append: bool = False) -> None:
+        self.kv._put_raw(self.txn, pack(key), value, append)
+
+    def put_raw(
+        self, raw_key: bytes, value: Value | bytes, *, append: bool = False
+    ) -> None:
+        self.kv._put_raw(self.txn, raw_key, value, append)
+
+    def delete(self, key: Key) -> bool:
+        return self.kv._delete_raw(self.txn, key)
+
+
+# Scan bodies shared by KV and Cursor. Each takes a context manager for the
+# read transaction, so a lone scan can pass a plain ``env.begin()`` with no
+# wrapper generator in between.
+def _iter_prefix(
+    reader: ContextManager[lmdb.Transaction[bytes]], prefix: bytes, user_prefix: bytes
+) -> Iterator[tuple[Key, Value]]:
+    with reader as txn:
+        cursor = txn.cursor()
+        if not cursor.set_range(prefix):
+            return
+        for k, v in cursor:
+            if not k.startswith(prefix):
+                break
+            key = unpack(k)
+            # A shorter user key can match when its time fields continue the prefix.
+            if key.user_key.startswith(user_prefix):
+                yield key, decode(v)
+
+
+def _iter_prefix_keys(
+    reader: ContextManager[lmdb.Transaction[bytes]], prefix: bytes, user_prefix: bytes
+) -> Iterator[Key]:
+    with reader as txn:
+        cursor = txn.cursor()
+        if not cursor.set_range(prefix):
+            return
+        for k in cursor.iternext(values=False):
+            if not k.startswith(prefix):
+                break
+            key = unpack(k)
+            if key.user_key.startswith(user_prefix):
+                yield key
+
+
+def _iter_range(
+    reader: ContextManager[lmdb.Transaction[bytes]], lo_raw: bytes, hi_raw: bytes
+) -> Iterator[tuple[Key, Value]]:
+    with reader as txn:
+        cursor = txn.cursor()
+        if not cursor.set_range(lo_raw):
+            return
+        for k, v in cursor:
+            if k >= hi_raw:
+                break
+            yield unpack(k), decode(v)
+
+
+class Cursor:
+    """Scans within one partition over a shared read transaction; see :meth:`KV.cursor`."""
+
+    def __init__(self, partition: int, txn: lmdb.Transaction[bytes]) -> None:
+        self.partition = partition
+        self._partition = PARTITION.pack(partition)
+        self._txn = nullcontext(txn)
+        self._cursor = txn.cursor()
+
+    def seek_prefix(self, user_prefix: bytes) -> bool:
+        """Move to the first key starting with ``user_prefix``; return whether there is one."""
+        prefix = self._partition + user_prefix
+        cursor = self._cursor
+        return cursor.set_range(prefix) and cursor.key().startswith(prefix)
+
+    def iter_prefix(self, user_prefix: bytes) -> Iterator[tuple[Key, Value]]:
+        """Yield entries whose user key starts with ``user_prefix``, in key order."""
+        return _iter_prefix(self._txn, self._partition + user_prefix, user_prefix)
+
+    def iter_prefix_keys(self, user_prefix: bytes) -> Iterator[Key]:
+        """Like :meth:`iter_prefix` but yield keys only, without reading values."""
+        return _iter_prefix_keys(self._txn, self._partition + user_prefix, user_prefix)
+
+    def iter_range(self, lo: Key, hi: Key) -> Iterator[tuple[Key, Value]]:
+        """Yield entries with ``lo <= key < hi`` in key order."""
+        return _iter_range(self._txn, pack(lo), pack(hi))
+
+
+class _SharedReader:
+    """A thread's shared read transaction and how many readers hold it."""
+
+    __slots__ = ("txn", "refs")
+
+    def __init__(self) -> None:
+        self.txn: Optional[lmdb.Transaction[bytes]] = None
+        self.refs = 0
+
+
+class _Readers(threading.local):
+    """Per-thread :class:`_SharedReader`, created on first use in each thread."""
+
+    def __init__(self) -> None:
+        self.state = _SharedReader()
+
 
 class KV:
-    """Minimal LMDB wrapper using bitemporal keys and typed values."""
+    """Minimal LMDB wrapper using bitemporal keys and typed values.
+
+    Entries live in the ``data`` sub-database; ``counts`` holds a per-partition
+    entry counter, ``latest`` maps each ``partition | user_key`` to the
+    ``valid_from | tx_id`` of its newest version, and ``txlog`` holds every
+    data key rotated to ``tx_id | partition | user_key | valid_from``, ordering
+    entries by transaction time. All three are maintained in the same
+    transaction as each write.
+    """
 
     def __init__(
-        self, path: str, readonly: bool = False, *, clock: Clock = MonotonicClock()
+        self,
+        path: str,
+        readonly: bool = False,
+        *,
+        clock: Clock = MonotonicClock(),
+        map_size: int = 1 << 30,
+        writemap: bool = False,
+        sync: bool = True,
     ) -> None:
-        self.env = lmdb.open(path, readonly=readonly, max_dbs=1)
+        """Open the environment at ``path``.
+
+        ``map_size`` bounds the database size; it only reserves address space.
+        ``writemap=True`` writes through the memory map, avoiding a copy per page.
+        ``sync=False`` skips the fsync on each commit (asynchronous with
+        ``writemap``): much faster per-write commits, but the latest
+        transactions can be lost on a crash unless :meth:`sync` is called.
+        """
+        writemap = writemap and not readonly
+        self.env = lmdb.open(
+            path,
+            readonly=readonly,
+            max_dbs=4,
+            map_size=map_size,
+            writemap=writemap,
+            sync=sync,
+            metasync=sync,
+            map_async=writemap and not sync,
+        )
+        self._data = self.env.open_db(b"data", create=not readonly)
+        self._counts = self.env.open_db(b"counts", create=not readonly)
+        self._latest = self.env.open_db(b"latest", create=not readonly)
+        self._txlog = self.env.open_db(b"txlog", create=not readonly)
         self.clock = clock
+        self._readers = _Readers()
+
+    def sync(self) -> None:
+        """Flush committed writes to disk, e.g. after writing with ``sync=False``."""
+        self.env.sync(True)
+
+    def _put_raw(
+        self,
+        txn: lmdb.Transaction,
+        raw_key: bytes,
+        value: Value | bytes,
+        append: bool = False,
+    ) -> None:
+        raw_value = encode(_as_value(value))
+        # MDB_APPEND skips the B-tree search but only succeeds for a key past
+        # the current last key; anything else falls back to a normal insert.
+        if (append and txn.put(raw_key, raw_value, append=True)) or txn.put(
+            raw_key, raw_value, overwrite=False
+        ):
+            self._bump(txn, PARTITION.unpack_from(raw_key)[0], 1)
+        else:
+            txn.put(raw_key, raw_value)
+        txn.put(_tx_key(raw_key), b"", db=self._txlog)
+        entity, version = raw_key[: -VERSION.size], raw_key[-VERSION.size :]
+        current = txn.get(entity, db=self._latest)
+        # Big-endian versions compare correctly as bytes.
+        if current is None or version > bytes(current):
+            txn.put(entity, version, db=self._latest)
+
+    def _delete_raw(self, txn: lmdb.Transaction, key: Key) -> bool:
+        raw_key = pack(key)
+        if not txn.delete(raw_key):
+            return False
+        self._bump(txn, key[0], -1)
+        txn.delete(_tx_key(raw_key), db=self._txlog)
+        entity, version = raw_key[: -VERSION.size], raw_key[-VERSION.size :]
+        if txn.get(entity, db=self._latest) == version:
+            self._repoint_latest(txn, key[1], entity)
+        return True
+
+    def _repoint_latest(
+        self, txn: lmdb.Transaction, user_key: bytes, entity: bytes
+    ) -> None:
+        newest = None
+        cursor = txn.cursor()
+        if cursor.set_range(entity):
+            for k in map(bytes, cursor.iternext(values=False)):
+                if not k.startswith(entity):
+                    break
+                if unpack(k).user_key == user_key:
+                    newest = k[-VERSION.size :]
+        if newest is None:
+            txn.delete(entity, db=self._latest)
+        else:
+            txn.put(entity, newest, db=self._latest)
+
+    def _bump(self, txn: lmdb.Transaction, partition: int, delta: int) -> None:
+        counter_key = PARTITION.pack(partition)
+        raw = txn.get(counter_key, db=self._counts)
+        current = _COUNT.unpack(raw)[0] if raw is not None else 0
+        txn.put(counter_key, _COUNT.pack(current + delta), db=self._counts)
 
     def get(self, key: Key) -> Optional[Value]:
-        with self.env.begin() as txn:
+        with self.env.begin(db=self._data) as txn:
             raw = txn.get(pack(key))
             return decode(raw) if raw is not None else None
 
-    def put(self, key: Key, value: Value | bytes) -> None:
-        if not isinstance(value, (RawValue, JSONValue)):
-            value = RawValue(payload=value)
-        with self.env.begin(write=True) as txn:
-            txn.put(pack(key), encode(value))
+    def get_latest(self, partition: int, user_key: bytes) -> Optional[Value]:
+        """Return the newest version of ``user_key`` by ``(valid_from, tx_id)``.
+
+        This is a point lookup in the ``latest`` index followed by one read,
+        however many versions the key has.
+        """
+        entity = PARTITION.pack(partition) + user_key
+        with self.env.begin(db=self._data) as txn:
+            version = txn.get(entity, db=self._latest)
+            if version is None:
+                return None
+            raw = txn.get(entity + version)
+            return decode(raw) if raw is not None else None
+
+    def put(self, key: Key, value: Value | bytes, *, append: bool = False) -> None:
+        """Store ``value`` under ``key``.
+
+        With ``append=True`` the write is first tried as an ``MDB_APPEND``,
+        which is cheaper when keys arrive in ascending order.
+        """
+        with self.env.begin(db=self._data, write=True) as txn:
+            self._put_raw(txn, pack(key), value, append)
+
+    def put_raw(
+        self, raw_key: bytes, value: Value | bytes, *, append: bool = False
+    ) -> None:
+        """Store ``value`` under an already packed key, e.g. from :func:`pack_fields`."""
+        with self.env.begin(db=self._data, write=True) as txn:
+            self._put_raw(txn, raw_key, value, append)
+
+    def put_many(self, items: Iterable[tuple[Key, Value | bytes]]) -> None:
+        """Store every ``(key, value)`` pair in a single write transaction."""
+        with self.env.begin(db=self._data, write=True) as txn:
+            for key, value in items:
+                self._put_raw(txn, pack(key), value)
+
+    def get_many(self, keys: Iterable[Key]) -> list[Optional[Value]]:
+        """Look up ``keys`` in one read transaction, in the order given."""
+        with self.env.begin(db=self._data) as txn:
+            raws = [txn.get(pack(key)) for key in keys]
+        return [decode(raw) if raw is not None else None for raw in raws]
+
+    @contextmanager
+    def _reader(self) -> Iterator[lmdb.Transaction[bytes]]:
+        """Yield this thread's shared read transaction, beginning one if needed.
+
+        Overlapping readers on a thread reuse one transaction while it still
+        sees the latest commit; once a write has landed, a reader gets a
+        private transaction instead. The shared one ends with its last reader.
+        """
+        state = self._readers.state
+        txn = state.txn
+        if txn is not None and txn.id() != self.env.info()["last_txnid"]:
+            with self.env.begin(db=self._data) as private:
+                yield private
+            return
+        if txn is None:
+            txn = state.txn = self.env.begin(db=self._data)
+        state.refs += 1
+        try:
+            yield txn
+        finally:
+            # ``state`` is captured, so this is right even if another thread
+            # finalizes an abandoned generator.
+            state.refs -= 1
+            if not state.refs:
+                state.txn = None
+                txn.abort()
+
+    def _read_txn(self) -> ContextManager[lmdb.Transaction[bytes]]:
+        """Return this thread's shared reader if one is open, else a plain transaction.
+
+        Lone scans take the plain transaction, which costs no more than a
+        direct ``env.begin()``.
+        """
+        if self._readers.state.txn is None:
+            return self.env.begin(db=self._data)
+        return self._reader()
+
+    @contextmanager
+    def cursor(self, partition: int) -> Iterator[Cursor]:
+        """Open a :class:`Cursor` over ``partition`` for several scans.
+
+        Cursors on the same thread share one read transaction, so nested and
+        interleaved scans don't each begin their own.
+        """
+        with self._reader() as txn:
+            yield Cursor(partition, txn)
+
+    @contextmanager
+    def batch(self, write: bool = True) -> Iterator[Batch]:
+        """Group operations into one transaction, committed when the block exits.
+
+        The transaction is aborted if the block raises. ``write=False`` opens
+        a read-only transaction, for many lookups against one snapshot.
+        """
+        with self.env.begin(db=self._data, write=write) as txn:
+            yield Batch(self, txn)
 
     def items(self) -> Iterable[tuple[Key, Value]]:
-        with self.env.begin() as txn:
-            cursor = txn.cursor()
-            for k, v in cursor:
+        with self._read_txn() as txn:
+            for k, v in txn.cursor():
                 yield unpack(k), decode(v)
 
+    def items_view(self) -> Iterator[tuple[Key, memoryview]]:
+        """Like :meth:`items` but yield each encoded value as a zero-copy view.
+
+        Views point into LMDB's memory map and are only valid until the
+        iterator advances; copy with ``bytes(view)`` to keep one.
+        """
+        with self.env.begin(db=self._data, buffers=True) as txn:
+            for k, v in txn.cursor():
+                yield unpack(bytes(k)), v
+
+    def range(self, lo: Key, hi: Key) -> Iterator[tuple[Key, Value]]:
+        """Yield entries with ``lo <= key < hi`` in key order.
+
+        The cursor seeks straight to ``lo`` and stops at the first key past
+        ``hi``, so only the requested slice of the database is visited.
+        """
+        return _iter_range(self._read_txn(), pack(lo), pack(hi))
+
+    def scan_prefix(
+        self, partition: int, user_prefix: bytes
+    ) -> Iterator[tuple[Key, Value]]:
+        """Yield entries in ``partition`` whose user key starts with ``user_prefix``.
+
+        Matching keys are contiguous, so the cursor seeks to the first one
+        and stops at the first key past the prefix.
+        """
+        prefix = PARTITION.pack(partition) + user_prefix
+        return _iter_prefix(self._read_txn(), prefix, user_prefix)
+
+    def scan_prefix_keys(self, partition: int, user_prefix: bytes) -> Iterator[Key]:
+        """Like :meth:`scan_prefix` but yield keys only, without reading values."""
+        prefix = PARTITION.pack(partition) + user_prefix
+        return _iter_prefix_keys(self._read_txn(), prefix, user_prefix)
+
+    def as_of_valid(
+        self, partition: int, user_key: bytes, valid_at: int
+    ) -> Optional[tuple[Key, Value]]:
+        """Return the latest version of ``user_key`` valid at ``valid_at``.
+
+        Versions are ordered by ``(valid_from, tx_id)``, so this is a single
+        seek past ``valid_at`` followed by a step back rather than a scan.
+        Keys with no versions, and queries at or after the newest version,
+        are answered from the ``latest`` index without touching the cursor.
+        """
+        entity = PARTITION.pack(partition) + user_key
+        lo_raw = pack(Key(partition, user_key, 0, 0))
+        # Smallest key sorting after every version with valid_from <= valid_at.
+        seek_raw = pack(Key(partition, user_key, valid_at, _MAX_U64)) + b"\x00"
+        with self.env.begin(db=self._data) as txn:
+            newest = txn.get(entity, db=self._latest)
+            if newest is None:
+                return None
+            if VERSION.unpack(newest)[0] <= valid_at:
+                raw_key = entity + newest
+                raw_value = txn.get(raw_key)
+                if raw_value is not None:
+                    return unpack(raw_key), decode(raw_value)
+            cursor = txn.cursor()
+            found = cursor.set_range(seek_raw)
+            positioned = cursor.prev() if found else cursor.last()
+            # Longer keys sharing this prefix may sort between versions.
+            while positioned and cursor.key() >= lo_raw:
+                key = unpack(cursor.key())
+                if key.user_key == user_key:
+                    return key, decode(cursor.value())
+                positioned = cursor.prev()
+        return None
+
+    def as_of_tx(
+        self, tx_id_lo: int, tx_id_hi: int = _MAX_U64
+    ) -> Iterator[tuple[Key, Value]]:
+        """Yield current entries whose key has ``tx_id_lo <= tx_id < tx_id_hi``.
+
+        Entries come in ``tx_id`` order, then key order, from one contiguous
+        walk of the ``txlog`` index. This filters the live data by ``tx_id``;
+        it is not a historical snapshot. Overwriting a packed key yields its
+        newest value, and deleted entries are gone.
+        """
+        hi_raw = _TX_ID.pack(tx_id_hi)
+        with self._read_txn() as txn:
+            cursor = txn.cursor(db=self._txlog)
+            if not cursor.set_range(_TX_ID.pack(tx_id_lo)):
+                return
+            for tx_key in cursor.iternext(values=False):
+                if tx_key >= hi_raw:
+                    break
+                raw_key = tx_key[_TX_ID.size :] + tx_key[: _TX_ID.size]
+                raw_value = txn.get(raw_key)
+                # Written in the same transaction as data, so a miss means a damaged index.
+                if raw_value is not None:
+                    yield unpack(raw_key), decode(raw_value)
+
+    def count(self, partition: Optional[int] = None) -> int:
+        """Return the number of stored entries, optionally within ``partition``.
+
+        Both forms are constant time: the total comes from LMDB's own page
+        statistics and per-partition totals from the ``counts`` sub-database.
+        """
+        with self.env.begin(db=self._data) as txn:
+            if partition is None:
+                return int(txn.stat(self._data)["entries"])
+            raw = txn.get(PARTITION.pack(partition), db=self._counts)
+            return _COUNT.unpack(raw)[0] if raw is not None else 0
+
     def delete(self, key: Key) -> bool:
         """Remove ``key`` from the database."""
-        encoded = pack(key)
-        with self.env.begin(write=True) as txn:
-            return bool(txn.delete(encoded))
+        with self.env.begin(db=self._data, write=True) as txn:
+            return self._delete_raw(txn, key)
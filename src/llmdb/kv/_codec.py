@@ -1,9 +1,44 @@
 from __future__ import annotations
 
+import json
 from dataclasses import dataclass
-from typing import ClassVar, Literal, Union
+from typing import Any, ClassVar, Literal, Union
 
-__all__ = ["RawValue", "JSONValue", "Value", "encode", "decode"]
+__all__ = [
+    "RawValue",
+    "JSONValue",
+    "MsgPackValue",
+    "Value",
+    "encode",
+    "decode",
+    "decode_view",
+    "json_dumps",
+    "json_loads",
+]
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without the speedups extra
+
+    def json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+    def json_loads(data: bytes) -> Any:
+        return json.loads(data)
+
+else:
+
+    def json_dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+    def json_loads(data: bytes) -> Any:
+        return orjson.loads(data)
+
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - exercised only without the msgpack extra
+    msgpack = None
 
 
 @dataclass(slots=True)
@@ -17,19 +52,66 @@ class JSONValue:
     type_tag: ClassVar[Literal[0x01]] = 0x01
     payload: bytes = b""
 
+    @classmethod
+    def from_obj(cls, obj: Any) -> JSONValue:
+        """Serialize ``obj`` to compact UTF-8 JSON."""
+        return cls(payload=json_dumps(obj))
+
+    def to_obj(self) -> Any:
+        """Parse the JSON payload."""
+        return json_loads(self.payload)
 
-Value = Union[RawValue, JSONValue]
+
+@dataclass(slots=True)
+class MsgPackValue:
+    type_tag: ClassVar[Literal[0x02]] = 0x02
+    payload: bytes = b""
+
+    @classmethod
+    def from_obj(cls, obj: Any) -> MsgPackValue:
+        """Serialize ``obj`` to MessagePack; requires the ``msgpack`` extra."""
+        if msgpack is None:
+            raise ImportError("MsgPackValue requires the 'msgpack' package")
+        return cls(payload=msgpack.packb(obj, use_bin_type=True))
+
+    def to_obj(self) -> Any:
+        """Parse the MessagePack payload."""
+        if msgpack is None:
+            raise ImportError("MsgPackValue requires the 'msgpack' package")
+        return msgpack.unpackb(self.payload, raw=False, strict_map_key=False)
+
+
+Value = Union[RawValue, JSONValue, MsgPackValue]
+
+
+_VALUE_TYPES: dict[int, type[Value]] = {
+    cls.type_tag: cls for cls in (RawValue, JSONValue, MsgPackValue)
+}
+# One-byte tag prefixes, built once instead of per encode.
+_TAG_BYTES = {tag: bytes((tag,)) for tag in _VALUE_TYPES}
 
 
 def encode(value: Value) -> bytes:
-    return bytes([value.type_tag]) + value.payload
+    return _TAG_BYTES[value.type_tag] + value.payload
 
 
 def decode(data: bytes) -> Value:
+    cls = _VALUE_TYPES.get(data[0])
+    if cls is None:
+        raise ValueError(f"Unknown type tag: {data[0]}")
+    # Filling the single slot directly skips the generated dataclass __init__.
+    value = object.__new__(cls)
+    value.payload = data[1:]
+    return value
+
+
+def decode_view(data: memoryview) -> tuple[int, memoryview]:
+    """Split an encoded value into its type tag and a zero-copy payload view.
+
+    Meant for buffers from :meth:`KV.items_view`; the view is only valid
+    while the LMDB transaction that produced it is open.
+    """
     tag = data[0]
-    payload = data[1:]
-    if tag == RawValue.type_tag:
-        return RawValue(payload=payload)
-    if tag == JSONValue.type_tag:
-        return JSONValue(payload=payload)
-    raise ValueError(f"Unknown type tag: {tag}")
+    if tag not in _VALUE_TYPES:
+        raise ValueError(f"Unknown type tag: {tag}")
+    return tag, data[1:]
@@ -15,12 +15,12 @@ class Clock(Protocol):
 
 class MonotonicClock:
     def now_ts(self) -> int:
-        return int(time.monotonic() * 1_000_000)
+        return time.monotonic_ns() // 1000
 
 
 class WallClock:
     def now_ts(self) -> int:
-        return int(time.time() * 1_000_000)
+        return time.time_ns() // 1000
 
 
 def now_ts(clock: Clock | None = None) -> int:
@@ -1,19 +1,50 @@
+"""Bitemporal key encoding.
+
+Keys are packed as ``[partition: u32][user_key: bytes][valid_from: u64][tx_id: u64]``
+with big-endian integers, so LMDB's lexicographic order sorts the versions of a
+``user_key`` by valid time and then transaction time.
+
+The user key has no length prefix or terminator, so those versions are not
+necessarily adjacent: keys that extend it, such as ``b"foo\x00..."`` for
+``b"foo"``, can sort between them. Prefix and range scans over one user key
+must therefore compare ``Key.user_key`` exactly and may step past such keys.
+"""
+
 from __future__ import annotations
 
 import struct
+from typing import NamedTuple
+
+__all__ = ["Key", "PARTITION", "VERSION", "pack", "pack_fields", "unpack"]
 
-__all__ = ["Key", "pack", "unpack"]
+# Precompiled codecs for the fixed-width fields around the user key.
+PARTITION = struct.Struct(">I")
+VERSION = struct.Struct(">QQ")
+# Builds a Key without running NamedTuple's Python-level __new__.
+_new_tuple = tuple.__new__
 
-Key = tuple[int, bytes, int, int]
+
+class Key(NamedTuple):
+    partition: int
+    user_key: bytes
+    valid_from: int = 0
+    tx_id: int = 0
 
 
 def pack(key: Key) -> bytes:
-    partition, user_key, valid_from, tx_id = key
-    header = struct.pack(">IIQQ", partition, len(user_key), valid_from, tx_id)
-    return header + user_key
+    return pack_fields(*key)
+
+
+def pack_fields(
+    partition: int, user_key: bytes, valid_from: int = 0, tx_id: int = 0
+) -> bytes:
+    """Pack key fields directly, for hot paths that never need a :class:`Key`."""
+    return b"".join(
+        (PARTITION.pack(partition), user_key, VERSION.pack(valid_from, tx_id))
+    )
 
 
 def unpack(b: bytes) -> Key:
-    partition, key_len, valid_from, tx_id = struct.unpack(">IIQQ", b[:24])
-    user_key = b[24 : 24 + key_len]
-    return partition, user_key, valid_from, tx_id
+    valid_from, tx_id = VERSION.unpack_from(b, len(b) - VERSION.size)
+    user_key = b[PARTITION.size : -VERSION.size]
+    return _new_tuple(Key, (PARTITION.unpack_from(b)[0], user_key, valid_from, tx_id))
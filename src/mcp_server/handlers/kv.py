@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 import base64
+from functools import lru_cache
 
-__all__ = ["router"]
+__all__ = ["router", "get_kv"]
 
 from fastapi import APIRouter, HTTPException, Response, Depends
 
@@ -12,20 +13,30 @@ from llmdb.temporal_key import Key
 router = APIRouter()
 
 
+def get_kv() -> KV:
+    """Dependency placeholder; :func:`mcp_server.server.create_app` overrides it."""
+    raise RuntimeError("no KV store configured")
+
+
+@lru_cache(maxsize=1024)
 def _decode_key(encoded: str) -> Key:
-    user_key = base64.urlsafe_b64decode(encoded + "=")
+    # Clients may strip the padding; restore exactly what is missing.
+    pad = -len(encoded) % 4
+    user_key = base64.urlsafe_b64decode(encoded + "=" * pad)
     return (0, user_key, 0, 0)
 
 
 @router.put("/kv/{key}")
-async def put_value(key: str, body: dict[str, str], kv: KV = Depends()) -> Response:
+async def put_value(
+    key: str, body: dict[str, str], kv: KV = Depends(get_kv)
+) -> Response:
     value = base64.urlsafe_b64decode(body["value"])
     kv.put(_decode_key(key), RawValue(payload=value))
     return Response(status_code=204)
 
 
 @router.get("/kv/{key}")
-async def get_value(key: str, kv: KV = Depends()) -> dict[str, str]:
+async def get_value(key: str, kv: KV = Depends(get_kv)) -> dict[str, str]:
     val = kv.get(_decode_key(key))
     if val is None:
         raise HTTPException(status_code=404)
@@ -33,7 +44,7 @@ async def get_value(key: str, kv: KV = Depends()) -> dict[str, str]:
 
 
 @router.delete("/kv/{key}")
-async def delete_value(key: str, kv: KV = Depends()) -> Response:
+async def delete_value(key: str, kv: KV = Depends(get_kv)) -> Response:
     if not kv.delete(_decode_key(key)):
         raise HTTPException(status_code=404)
     return Response(status_code=204)
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+__all__ = ["create_app"]
+
 from fastapi import FastAPI
 
 from .handlers import ping
@@ -19,7 +21,7 @@ def create_app(
     settings = settings or Settings()
     kv = kv or KV(settings.db_path, clock=clock or MonotonicClock())
     app = FastAPI()
-    app.dependency_overrides[KV] = lambda: kv
+    app.dependency_overrides[kv_router.get_kv] = lambda: kv
     app.include_router(ping.router)
     app.include_router(kv_router.router)
     return app
@@ -0,0 +1,33 @@
+import math
+
+import pytest
+
+from llmdb.analytics import as_of_values, history_arrays
+from llmdb.kv import KV
+
+np = pytest.importorskip("numpy")
+
+
+def test_history_arrays_and_as_of_values(tmp_path):
+    db = KV(str(tmp_path))
+    db.put((0, b"emp", 10, 1), b"100")
+    db.put((0, b"emp", 20, 2), b"200")
+    db.put((0, b"emp", 20, 3), b"250")  # correction of the version at 20
+    db.put((0, b"emp2", 5, 1), b"999")
+
+    valid_from, tx_id, values = history_arrays(
+        db, 0, b"emp", lambda v: float(v.payload)
+    )
+    assert valid_from.tolist() == [10, 20, 20]
+    assert tx_id.tolist() == [1, 2, 3]
+
+    out = as_of_values(valid_from, values, np.array([5, 10, 15, 20, 99]))
+    assert math.isnan(out[0])
+    assert out[1:].tolist() == [100.0, 100.0, 250.0, 250.0]
+    assert values.tolist() == [100.0, 200.0, 250.0]
+
+
+def test_as_of_values_empty_history():
+    empty = np.array([], dtype=np.int64)
+    out = as_of_values(empty, np.array([], dtype=np.float64), np.array([1, 2]))
+    assert np.isnan(out).all()
@@ -14,3 +14,13 @@ def test_edges_roundtrip(tmp_path):
     out = list(g.out_edges(b"a", as_of_valid=2))
     assert len(out) == 1
     assert out[0][2]["w"] == 1
+
+
+def test_out_neighbors(tmp_path):
+    g = Graph(KV(str(tmp_path)))
+    g.put_edge((b"a", b"b", {}), valid_from=1, tx_id=1)
+    g.put_edge((b"a", b"c", {}), valid_from=5, tx_id=2)
+    g.put_edge((b"ab", b"x", {}), valid_from=1, tx_id=3)
+
+    assert list(g.out_neighbors(b"a", as_of_valid=2)) == [b"b"]
+    assert list(g.out_neighbors(b"a", as_of_valid=5)) == [b"b", b"c"]
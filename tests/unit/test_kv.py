@@ -1,5 +1,10 @@
+import inspect
+
+import pytest
+
 from llmdb.kv import KV
-from llmdb.kv._codec import RawValue
+from llmdb.kv._codec import JSONValue, MsgPackValue, RawValue, decode_view
+from llmdb.temporal_key import PARTITION, VERSION, pack_fields
 
 
 def test_put_get(tmp_path):
@@ -18,3 +23,238 @@ def test_delete(tmp_path):
     assert db.delete(key) is True
     assert db.get(key) is None
     assert db.delete(key) is False
+
+
+def test_range(tmp_path):
+    db = KV(str(tmp_path))
+    for valid_from in (3, 1, 2):
+        db.put((0, b"foo", valid_from, 0), RawValue(payload=b"%d" % valid_from))
+    db.put((0, b"bar", 1, 0), RawValue(payload=b"bar"))
+    db.put((0, b"fop", 1, 0), RawValue(payload=b"fop"))
+
+    out = list(db.range((0, b"foo", 0, 0), (0, b"foo", 3, 0)))
+    assert [key.valid_from for key, _ in out] == [1, 2]
+    assert all(key.user_key == b"foo" for key, _ in out)
+
+
+def test_as_of_valid(tmp_path):
+    db = KV(str(tmp_path))
+    db.put((0, b"foo", 10, 1), RawValue(payload=b"v10"))
+    db.put((0, b"foo", 20, 2), RawValue(payload=b"v20"))
+    db.put((0, b"foo", 20, 3), RawValue(payload=b"v20-corrected"))
+    db.put((0, b"foo\x00", 15, 4), RawValue(payload=b"other"))
+
+    assert db.as_of_valid(0, b"foo", 5) is None
+    key, value = db.as_of_valid(0, b"foo", 15)
+    assert (key.valid_from, value.payload) == (10, b"v10")
+    key, value = db.as_of_valid(0, b"foo", 2**64 - 1)
+    assert (key.tx_id, value.payload) == (3, b"v20-corrected")
+    assert db.as_of_valid(1, b"foo", 20) is None
+
+    # Longer keys sorting after every version of b"foo" are not walked past.
+    db.put((0, b"foobar", 30, 5), RawValue(payload=b"longer"))
+    key, value = db.as_of_valid(0, b"foo", 2**64 - 1)
+    assert (key.tx_id, value.payload) == (3, b"v20-corrected")
+    assert db.as_of_valid(0, b"fo", 2**64 - 1) is None
+
+
+def test_batch(tmp_path):
+    db = KV(str(tmp_path))
+    with db.batch() as b:
+        b.put((0, b"a", 0, 0), RawValue(payload=b"1"))
+        b.put((0, b"b", 0, 0), b"2")
+    assert [v.payload for _, v in db.items()] == [b"1", b"2"]
+
+    try:
+        with db.batch() as b:
+            b.put((0, b"c", 0, 0), b"3")
+            raise RuntimeError
+    except RuntimeError:
+        pass
+    assert db.get((0, b"c", 0, 0)) is None
+
+
+def test_json_value_roundtrip(tmp_path):
+    db = KV(str(tmp_path))
+    key = (0, b"doc", 0, 0)
+    db.put(key, JSONValue.from_obj({"a": [1, 2], 3: "x"}))
+    val = db.get(key)
+    assert isinstance(val, JSONValue)
+    assert val.to_obj() == {"a": [1, 2], "3": "x"}
+
+
+def test_msgpack_value_roundtrip(tmp_path):
+    pytest.importorskip("msgpack")
+    db = KV(str(tmp_path))
+    key = (0, b"doc", 0, 0)
+    db.put(key, MsgPackValue.from_obj({"a": [1, 2], "b": {"c": 0.5}}))
+    val = db.get(key)
+    assert isinstance(val, MsgPackValue)
+    assert val.to_obj() == {"a": [1, 2], "b": {"c": 0.5}}
+
+
+def test_count(tmp_path):
+    db = KV(str(tmp_path))
+    db.put((0, b"a", 1, 0), b"1")
+    db.put((0, b"a", 2, 0), b"2")
+    db.put((0, b"a", 2, 0), b"2-overwrite")
+    with db.batch() as b:
+        b.put((1, b"b", 1, 0), b"3")
+    assert (db.count(), db.count(0), db.count(1), db.count(2)) == (3, 2, 1, 0)
+
+    db.put_raw(pack_fields(2, b"c", 1), b"4")
+    assert db.count(2) == 1
+    assert db.get((2, b"c", 1, 0)).payload == b"4"
+
+    db.delete((0, b"a", 1, 0))
+    db.delete((0, b"missing", 1, 0))
+    assert (db.count(), db.count(0)) == (3, 1)
+
+
+def test_put_append_falls_back_when_out_of_order(tmp_path):
+    db = KV(str(tmp_path))
+    db.put((0, b"s", 2, 0), b"2", append=True)
+    db.put((0, b"s", 3, 0), b"3", append=True)
+    db.put((0, b"s", 1, 0), b"1", append=True)
+    db.put((0, b"s", 3, 0), b"3-overwrite", append=True)
+    assert [(k.valid_from, v.payload) for k, v in db.items()] == [
+        (1, b"1"),
+        (2, b"2"),
+        (3, b"3-overwrite"),
+    ]
+    assert db.count(0) == 3
+
+
+def test_items_view(tmp_path):
+    db = KV(str(tmp_path))
+    db.put((0, b"a", 1, 0), RawValue(payload=b"x"))
+    db.put((0, b"b", 1, 0), JSONValue.from_obj([1]))
+    out = [(key.user_key, bytes(view)) for key, view in db.items_view()]
+    assert out == [(b"a", b"\x00x"), (b"b", b"\x01[1]")]
+
+    views = (decode_view(view) for _, view in db.items_view())
+    tags = [(tag, bytes(payload)) for tag, payload in views]
+    assert tags == [(RawValue.type_tag, b"x"), (JSONValue.type_tag, b"[1]")]
+
+
+def test_scan_prefix(tmp_path):
+    db = KV(str(tmp_path))
+    db.put((1, b"a\x00b", 1, 0), b"ab")
+    db.put((1, b"a\x00c", 1, 0), b"ac")
+    db.put((1, b"a", 1, 0), b"a")
+    db.put((1, b"b\x00a", 1, 0), b"ba")
+    db.put((2, b"a\x00z", 1, 0), b"other partition")
+
+    out = [v.payload for _, v in db.scan_prefix(1, b"a\x00")]
+    assert out == [b"ab", b"ac"]
+
+
+def test_cursor_scans_share_a_read_transaction(tmp_path):
+    db = KV(str(tmp_path))
+    for user_key in (b"a\x00b", b"a\x00c", b"b\x00a"):
+        db.put((1, user_key, 1, 0), user_key)
+
+    with db.cursor(1) as cursor:
+        assert cursor.seek_prefix(b"a\x00") and not cursor.seek_prefix(b"c")
+        assert [k.user_key for k in cursor.iter_prefix_keys(b"a\x00")] == [
+            b"a\x00b",
+            b"a\x00c",
+        ]
+        out = cursor.iter_range((1, b"a\x00c", 0, 0), (1, b"b\x00b", 0, 0))
+        assert [v.payload for _, v in out] == [b"a\x00c", b"b\x00a"]
+        with db.cursor(1):
+            # LMDB lists one line per active reader after its header line.
+            assert len(db.env.readers().splitlines()) == 2
+        # Scans inside an open cursor join its transaction too.
+        scan = db.scan_prefix(1, b"b")
+        assert next(scan)[1].payload == b"b\x00a"
+        assert len(db.env.readers().splitlines()) == 2
+        assert list(scan) == []
+
+    # A reader started after a write must not reuse the older snapshot.
+    stale = db.scan_prefix(1, b"a\x00")
+    next(stale)
+    db.put((1, b"a\x00d", 1, 0), b"a\x00d")
+    assert [k.user_key for k in db.scan_prefix_keys(1, b"a\x00")][-1] == b"a\x00d"
+    assert [v.payload for _, v in stale] == [b"a\x00c"]
+
+
+def test_put_wraps_bytes_like_values(tmp_path):
+    db = KV(str(tmp_path))
+    db.put((0, b"a", 0, 0), bytearray(b"from bytearray"))
+    db.put((0, b"b", 0, 0), memoryview(b"from memoryview"))
+    assert db.get((0, b"a", 0, 0)).payload == b"from bytearray"
+    assert db.get((0, b"b", 0, 0)).payload == b"from memoryview"
+
+
+def test_as_of_tx(tmp_path):
+    db = KV(str(tmp_path))
+    db.put((0, b"b", 10, 2), b"b@2")
+    db.put((0, b"a", 20, 3), b"a@3")
+    db.put((1, b"a", 5, 1), b"a@1")
+    db.put((0, b"a", 10, 2), b"a@2")
+
+    out = [(key.tx_id, value.payload) for key, value in db.as_of_tx(0, 3)]
+    assert out == [(1, b"a@1"), (2, b"a@2"), (2, b"b@2")]
+    assert [v.payload for _, v in db.as_of_tx(3)] == [b"a@3"]
+
+    db.delete((0, b"a", 10, 2))
+    assert [v.payload for _, v in db.as_of_tx(2, 3)] == [b"b@2"]
+
+    # The txlog key is no longer than the data key, so LMDB's key limit is unchanged.
+    longest = b"k" * (db.env.max_key_size() - PARTITION.size - VERSION.size)
+    db.put((0, longest, 1, 9), b"long")
+    assert [(k.user_key, v.payload) for k, v in db.as_of_tx(9, 10)] == [
+        (longest, b"long")
+    ]
+
+
+def test_put_many_get_many_and_read_batch(tmp_path):
+    db = KV(str(tmp_path))
+    keys = [(0, b"k%d" % i, 1, 0) for i in range(3)]
+    db.put_many((k, b"v%d" % i) for i, k in enumerate(keys))
+    assert db.count(0) == 3
+
+    out = db.get_many([keys[2], (0, b"missing", 0, 0), keys[0]])
+    assert [v.payload if v else None for v in out] == [b"v2", None, b"v0"]
+
+    with db.batch() as b:
+        assert b.delete(keys[1])
+        assert not b.delete(keys[1])
+    with db.batch(write=False) as b:
+        assert b.get(keys[0]).payload == b"v0"
+        assert b.get(keys[1]) is None
+    assert db.count(0) == 2
+
+
+def test_get_latest(tmp_path):
+    db = KV(str(tmp_path))
+    db.put((0, b"a", 5, 1), b"v5")
+    db.put((0, b"a", 2, 1), b"v2")
+    db.put((0, b"ab", 9, 1), b"other key")
+    assert db.get_latest(0, b"a").payload == b"v5"
+    assert db.get_latest(0, b"missing") is None
+
+    db.delete((0, b"a", 5, 1))
+    assert db.get_latest(0, b"a").payload == b"v2"
+    db.delete((0, b"a", 2, 1))
+    assert db.get_latest(0, b"a") is None
+    assert db.get_latest(0, b"ab").payload == b"other key"
+
+
+def test_writemap_without_sync(tmp_path):
+    db = KV(str(tmp_path), writemap=True, sync=False, map_size=1 << 24)
+    db.put((0, b"k", 1, 0), b"v")
+    db.sync()
+    assert db.get((0, b"k", 1, 0)).payload == b"v"
+    assert db.env.info()["map_size"] == 1 << 24
+
+
+def test_kv_is_the_package_module():
+    import llmdb.kv
+
+    # A stray ``llmdb/kv.py`` would shadow the package and its Key-based API.
+    assert llmdb.kv.__file__.endswith("__init__.py")
+    assert (
+        inspect.signature(KV).parameters["clock"].kind is inspect.Parameter.KEYWORD_ONLY
+    )
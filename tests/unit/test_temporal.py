@@ -1,5 +1,5 @@
-from llmdb.temporal import MonotonicClock, now_ts
-from llmdb.temporal_key import pack, unpack
+from llmdb.temporal import MonotonicClock, WallClock, now_ts
+from llmdb.temporal_key import Key, pack, pack_fields, unpack
 
 
 def test_now_ts(monkeypatch):
@@ -9,7 +9,23 @@ def test_now_ts(monkeypatch):
     assert t2 >= t1
 
 
+def test_wall_clock_keeps_microsecond_precision(monkeypatch):
+    # Past 2**53 ns a float round-trip would no longer be exact.
+    monkeypatch.setattr("time.time_ns", lambda: 1_752_000_000_123_456_789)
+    assert WallClock().now_ts() == 1_752_000_000_123_456
+
+
 def test_pack_roundtrip():
     key = (1, b"k", 2, 3)
     packed = pack(key)
     assert unpack(packed) == key
+
+
+def test_pack_orders_versions_by_user_key():
+    keys = [(0, b"b", 1, 0), (0, b"a", 2, 0), (0, b"a", 1, 5), (0, b"a", 1, 1)]
+    assert sorted(keys, key=pack) == sorted(keys)
+
+
+def test_pack_fields_matches_pack():
+    assert pack_fields(1, b"k", 2, 3) == pack((1, b"k", 2, 3))
+    assert pack_fields(1, b"k") == pack(Key(1, b"k"))